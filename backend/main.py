@@ -1,31 +1,101 @@
 from fastapi import FastAPI, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+import bisect
+import functools
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from itertools import repeat
 import json
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
 from pathlib import Path
 from datetime import datetime
 
-app = FastAPI(title="Sehat.a Backend", version="4.5.0")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    process = None
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson's C serializer"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+DefaultResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_scoring_pool()
+    yield
+    stop_scoring_pool()
+
+app = FastAPI(title="Sehat.a Backend", version="4.5.0", default_response_class=DefaultResponse, lifespan=lifespan)
 
 # -------------------------------
 # Data Directory
 # -------------------------------
 DATA_DIR = Path(__file__).resolve().parent / "data"
 
+def _read_json(file_path: Path):
+    if orjson is not None:
+        return orjson.loads(file_path.read_bytes())
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 def load_json(file_path: Path, fallback):
-    """Utility to safely load a JSON file and log status"""
+    """Utility to safely load a JSON file (through a pickle cache) and log status"""
     print(f"🔍 Looking for: {file_path}")
     if not file_path.exists():
         print(f"⚠️ File not found: {file_path}")
         return fallback
+
+    # Reuse the pickled copy unless the JSON has been edited since it was written
+    cache_path = file_path.with_suffix(".pkl")
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            print(f"✅ Loaded {file_path.name} with {len(data) if isinstance(data, list) else len(data.keys())} records")
+        if cache_path.exists() and cache_path.stat().st_mtime >= file_path.stat().st_mtime:
+            with open(cache_path, "rb") as f:
+                data = pickle.load(f)
+            print(f"✅ Loaded {file_path.name} from cache with {len(data) if isinstance(data, list) else len(data.keys())} records")
             return data
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable cache {cache_path}: {e}")
+
+    try:
+        data = _read_json(file_path)
+        print(f"✅ Loaded {file_path.name} with {len(data) if isinstance(data, list) else len(data.keys())} records")
     except Exception as e:
         print(f"⚠️ Error reading {file_path}: {e}")
         return fallback
 
+    tmp_path = cache_path.with_suffix(f".pkl.{os.getpid()}")
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=5)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"⚠️ Could not write cache {cache_path}: {e}")
+    finally:
+        # Only still present if the dump or the replace failed
+        tmp_path.unlink(missing_ok=True)
+    return data
+
 # -------------------------------
 # Load Datasets
 # -------------------------------
@@ -46,6 +116,200 @@ print(
     f"translations={len(translations)} keys"
 )
 
+# -------------------------------
+# Intern Repeated Dataset Strings (one shared object per distinct symptom/disease)
+# -------------------------------
+for record in disease_data:
+    if isinstance(record.get("disease"), str):
+        record["disease"] = sys.intern(record["disease"])
+    if "common_symptoms" in record:
+        record["common_symptoms"] = [sys.intern(s) for s in record["common_symptoms"]]
+
+# -------------------------------
+# Normalized Fields (computed once, indexed by position in disease_data)
+# -------------------------------
+DISEASE_NAMES_LOWER = [str(record.get("disease", "")).lower().strip() for record in disease_data]
+DISEASE_SYMPTOMS_LOWER = [frozenset(sys.intern(s.strip().lower()) for s in record.get("common_symptoms", [])) for record in disease_data]
+
+# -------------------------------
+# Symptom Index (inverted: symptom -> disease positions)
+# -------------------------------
+@dataclass(frozen=True, slots=True)
+class SymptomPostings:
+    """Disease positions per symptom, packed CSR-style into two int32 arrays"""
+    rows: dict[str, int]
+    indptr: "np.ndarray"
+    indices: "np.ndarray"
+
+    @classmethod
+    def build(cls, disease_symptoms: list[frozenset[str]]) -> "SymptomPostings":
+        postings: dict[str, list[int]] = {}
+        for idx, symptoms in enumerate(disease_symptoms):
+            for symptom in symptoms:
+                postings.setdefault(symptom, []).append(idx)
+        indptr = np.zeros(len(postings) + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum([len(p) for p in postings.values()])
+        indices = np.fromiter((idx for p in postings.values() for idx in p), dtype=np.int32, count=int(indptr[-1]))
+        return cls({symptom: row for row, symptom in enumerate(postings)}, indptr, indices)
+
+    def lookup(self, symptoms) -> "np.ndarray":
+        """Disease positions of every known symptom in symptoms, concatenated"""
+        rows = [self.rows[s] for s in symptoms if s in self.rows]
+        if not rows:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([self.indices[self.indptr[r]:self.indptr[r + 1]] for r in rows])
+
+if HAS_NUMPY:
+    SYMPTOM_POSTINGS = SymptomPostings.build(DISEASE_SYMPTOMS_LOWER)
+
+def top_k_indices(scores, k: int):
+    """Positions of the k highest non-zero scores, best first"""
+    candidates = np.flatnonzero(scores)
+    # Break ties by dataset position so results match a stable sort
+    keys = scores[candidates].astype(np.int64) * len(scores) - candidates
+    if len(candidates) > k:
+        part = np.argpartition(keys, -k)[-k:]
+        candidates, keys = candidates[part], keys[part]
+    return candidates[np.argsort(-keys)]
+
+# -------------------------------
+# Pure-Python Scoring (used when numpy is unavailable)
+# -------------------------------
+# Below this many diseases, dispatching to worker processes costs more than it saves
+PARALLEL_MIN_DISEASES = 20_000
+SCORING_WORKERS = os.cpu_count() or 1
+_scoring_pool = None
+_scoring_pool_lock = threading.Lock()
+
+def start_scoring_pool():
+    """Fork the scoring workers up front, before the server starts any threads"""
+    global _scoring_pool
+    if HAS_NUMPY or len(disease_data) < PARALLEL_MIN_DISEASES or SCORING_WORKERS < 2:
+        return
+    # Without fork, each worker would re-import this module and reload every dataset
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return
+    with _scoring_pool_lock:
+        if _scoring_pool is None:
+            pool = ProcessPoolExecutor(max_workers=SCORING_WORKERS, mp_context=multiprocessing.get_context("fork"))
+            # A fork-based pool launches all of its workers on the first submit
+            pool.submit(int).result()
+            _scoring_pool = pool
+
+def stop_scoring_pool():
+    global _scoring_pool
+    with _scoring_pool_lock:
+        if _scoring_pool is not None:
+            _scoring_pool.shutdown()
+            _scoring_pool = None
+
+def score_range(user_set: frozenset, start: int, stop: int) -> Counter:
+    """Shared-symptom counts for disease positions [start, stop)"""
+    scores = Counter()
+    for idx in range(start, stop):
+        score = len(user_set & DISEASE_SYMPTOMS_LOWER[idx])
+        if score > 0:
+            scores[idx] = score
+    return scores
+
+def score_all_diseases(user_set: frozenset) -> Counter:
+    """Score every disease, fanning out over the worker pool when it is running"""
+    n = len(disease_data)
+    pool = _scoring_pool
+    if pool is None:
+        return score_range(user_set, 0, n)
+
+    chunk = -(-n // SCORING_WORKERS)
+    starts = range(0, n, chunk)
+    stops = [min(start + chunk, n) for start in starts]
+    scores = Counter()
+    for part in pool.map(score_range, repeat(user_set), starts, stops):
+        scores += part
+    return scores
+
+# -------------------------------
+# Disease Name Index (character trigrams -> disease positions)
+# -------------------------------
+NAME_TRIGRAMS: dict[str, set[int]] = {}
+for idx, name in enumerate(DISEASE_NAMES_LOWER):
+    for i in range(len(name) - 2):
+        NAME_TRIGRAMS.setdefault(name[i:i + 3], set()).add(idx)
+
+def find_diseases_containing(query: str) -> list[int]:
+    """Positions of diseases whose lowercase name contains query, in dataset order"""
+    if len(query) < 3:
+        return [idx for idx, name in enumerate(DISEASE_NAMES_LOWER) if query in name]
+    # Every trigram of the query must occur in the name; verify survivors directly
+    postings = sorted((NAME_TRIGRAMS.get(query[i:i + 3], set()) for i in range(len(query) - 2)), key=len)
+    candidates = set.intersection(*postings)
+    return [idx for idx in sorted(candidates) if query in DISEASE_NAMES_LOWER[idx]]
+
+# Sorted (lowercase name, position) pairs for prefix-based suggestions
+SORTED_NAMES = sorted((name, idx) for idx, name in enumerate(DISEASE_NAMES_LOWER))
+
+def suggest_diseases(query: str, limit: int = 5) -> list[str]:
+    """Disease names sharing the longest prefix (up to 3 chars) with query"""
+    for n in range(min(len(query), 3), 0, -1):
+        prefix = query[:n]
+        start = bisect.bisect_left(SORTED_NAMES, (prefix,))
+        window = SORTED_NAMES[start:start + limit]
+        suggestions = [disease_data[idx].get("disease") for name, idx in window if name.startswith(prefix)]
+        if suggestions:
+            return suggestions
+    return []
+
+# -------------------------------
+# Vaccine Index (lowercased age text, in schedule order)
+# -------------------------------
+VACCINES_BY_AGE_TEXT = [
+    (v["age"].lower(), v)
+    for category in ["NIS_vaccines", "optional_private_vaccines"]
+    for v in vaccination_data.get("vaccinations", {}).get(category, [])
+]
+
+# Due windows: (age text marker, first month, last month) a vaccine is due in
+DUE_WINDOWS = [
+    ("birth", 0, 0),
+    ("6 weeks", 1, 2),
+    ("10 weeks", 2, 3),
+    ("14 weeks", 3, 4),
+    ("9-12 months", 9, 12),
+    ("16-24 months", 16, 24),
+    ("5-6 years", 60, 72),
+    ("10 years", 120, 132),
+]
+MAX_DUE_MONTH = max(hi for _, _, hi in DUE_WINDOWS)
+
+def min_age_months(age_str: str):
+    """Lower bound of a "<n>-<m> months" age text, or None if it has none"""
+    if "months" not in age_str:
+        return None
+    try:
+        return int(age_str.split("-")[0].replace("months", "").strip())
+    except ValueError:
+        return None
+
+DUE_BY_MONTH: list[list[dict]] = [[] for _ in range(MAX_DUE_MONTH + 1)]
+_upcoming = []
+for position, (vaccine_age, v) in enumerate(VACCINES_BY_AGE_TEXT):
+    due_months = {m for marker, lo, hi in DUE_WINDOWS if marker in vaccine_age for m in range(lo, hi + 1)}
+    for m in due_months:
+        DUE_BY_MONTH[m].append(v)
+    min_age = min_age_months(vaccine_age)
+    if min_age is not None:
+        _upcoming.append((min_age, position, v))
+_upcoming.sort(key=lambda entry: entry[:2])
+UPCOMING_MIN_AGES = [min_age for min_age, _, _ in _upcoming]
+UPCOMING_VACCINES = [v for _, _, v in _upcoming]
+
+# The schedule never changes at runtime, so encode the full catalogue once
+ALL_VACCINES_BODY = DefaultResponse(vaccination_data.get("vaccinations", {})).body
+
+@functools.lru_cache(maxsize=512)
+def vaccines_for_age(age_query: str) -> tuple:
+    """Vaccines whose age text overlaps the normalized age query"""
+    return tuple(v for vaccine_age, v in VACCINES_BY_AGE_TEXT if age_query in vaccine_age or vaccine_age in age_query)
+
 # -------------------------------
 # Helper: Translation
 # -------------------------------
@@ -77,12 +341,7 @@ def get_disease_info(name: str, lang: str = "en"):
         return {"error": t("unknown_query", lang)}
 
     query = name.lower().strip()
-    matches = []
-
-    for record in disease_data:
-        disease_name = str(record.get("disease", "")).lower().strip()
-        if query in disease_name:
-            matches.append(record)
+    matches = [disease_data[idx] for idx in find_diseases_containing(query)]
 
     if matches:
         return {
@@ -90,7 +349,17 @@ def get_disease_info(name: str, lang: str = "en"):
             "results": matches
         }
 
-    suggestions = [rec.get("disease") for rec in disease_data if query[0] in str(rec.get("disease", "")).lower()][:5]
+    suggestions = suggest_diseases(query)
+
+    # Typo tolerance: surface the closest whole name as the first suggestion.
+    # It stays a suggestion because near-identical names (e.g. "hepatitis e"
+    # vs "hepatitis a") can score just as high as a genuine misspelling.
+    if process is not None:
+        best = process.extractOne(query, DISEASE_NAMES_LOWER, scorer=fuzz.ratio, score_cutoff=80)
+        if best is not None:
+            closest = disease_data[best[2]].get("disease")
+            suggestions = [closest] + [s for s in suggestions if s != closest][:4]
+
     return {"error": f"No data found for '{name}'", "did_you_mean": suggestions}
 
 # -------------------------------
@@ -105,13 +374,23 @@ def symptom_check(symptoms: str, lang: str = "en"):
     user_symptoms = [s.strip().lower() for s in symptoms.split(",")]
     matches = []
 
-    for record in disease_data:
-        disease_symptoms = [s.strip().lower() for s in record.get("common_symptoms", [])]
-        score = len(set(user_symptoms) & set(disease_symptoms))
-        if score > 0:
+    if HAS_NUMPY:
+        postings = SYMPTOM_POSTINGS.lookup(set(user_symptoms))
+        scores = np.bincount(postings, minlength=len(disease_data))
+        for idx in top_k_indices(scores, 5):
+            record = disease_data[idx]
             matches.append({
                 "disease": record.get("disease"),
-                "match_score": score,
+                "match_score": int(scores[idx]),
+                "symptoms": record.get("common_symptoms", [])
+            })
+    else:
+        scores = score_all_diseases(frozenset(user_symptoms))
+        for idx in sorted(scores):
+            record = disease_data[idx]
+            matches.append({
+                "disease": record.get("disease"),
+                "match_score": scores[idx],
                 "symptoms": record.get("common_symptoms", [])
             })
 
@@ -129,24 +408,16 @@ def symptom_check(symptoms: str, lang: str = "en"):
 def get_all_vaccines(lang: str = "en"):
     if not vaccination_data:
         return {"error": t("unknown_query", lang)}
-    return vaccination_data.get("vaccinations", {})
+    return Response(content=ALL_VACCINES_BODY, media_type="application/json")
 
 @app.get("/vaccination/{age}")
 def get_vaccines_by_age(age: str, lang: str = "en"):
     if not vaccination_data:
         return {"error": t("unknown_query", lang)}
 
-    age_query = age.lower().strip()
-    results = []
-
-    for category in ["NIS_vaccines", "optional_private_vaccines"]:
-        for v in vaccination_data.get("vaccinations", {}).get(category, []):
-            vaccine_age = v["age"].lower()
-            if age_query in vaccine_age or vaccine_age in age_query:
-                results.append(v)
-
+    results = vaccines_for_age(age.lower().strip())
     if results:
-        return {"age": age, "vaccines": results}
+        return {"age": age, "vaccines": list(results)}
 
     return {"error": f"No vaccines found for age '{age}'"}
 
@@ -164,37 +435,9 @@ def get_due_vaccines(dob: str, lang: str = "en"):
     age_days = (today - dob_date).days
     age_months = age_days // 30
 
-    due_vaccines = []
-    upcoming_vaccine = None
-
-    for category in ["NIS_vaccines", "optional_private_vaccines"]:
-        for v in vaccination_data.get("vaccinations", {}).get(category, []):
-            age_str = v["age"].lower()
-
-            if "birth" in age_str and age_months == 0:
-                due_vaccines.append(v)
-            elif "6 weeks" in age_str and 1 <= age_months <= 2:
-                due_vaccines.append(v)
-            elif "10 weeks" in age_str and 2 <= age_months <= 3:
-                due_vaccines.append(v)
-            elif "14 weeks" in age_str and 3 <= age_months <= 4:
-                due_vaccines.append(v)
-            elif "9-12 months" in age_str and 9 <= age_months <= 12:
-                due_vaccines.append(v)
-            elif "16-24 months" in age_str and 16 <= age_months <= 24:
-                due_vaccines.append(v)
-            elif "5-6 years" in age_str and 60 <= age_months <= 72:
-                due_vaccines.append(v)
-            elif "10 years" in age_str and 120 <= age_months <= 132:
-                due_vaccines.append(v)
-
-            if not upcoming_vaccine and "months" in age_str:
-                try:
-                    min_age = int(age_str.split("-")[0].replace("months", "").strip())
-                    if min_age > age_months:
-                        upcoming_vaccine = v
-                except:
-                    pass
+    due_vaccines = DUE_BY_MONTH[age_months] if 0 <= age_months <= MAX_DUE_MONTH else []
+    next_idx = bisect.bisect_right(UPCOMING_MIN_AGES, age_months)
+    upcoming_vaccine = UPCOMING_VACCINES[next_idx] if next_idx < len(UPCOMING_VACCINES) else None
 
     return {
         "dob": str(dob_date),